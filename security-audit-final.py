@@ -10,12 +10,357 @@ Author: Security Audit Team
 Date: 2025
 """
 
+import argparse
+import codecs
 import json
 import os
+import pathlib
+import sqlite3
 import sys
-from typing import Dict, List, Set, Tuple
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
 import re
 
+# msgspec and orjson are optional; they only speed up lockfile decoding
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Attack dates used to bucket advisories into the two campaigns
+ATTACK_1_DATE = "2025-09-08"
+ATTACK_2_DATE = "2025-09-16"
+
+class Finding:
+    """A single compromised-package hit.
+
+    Findings are created in bulk on large fleet sweeps, so they use
+    __slots__, interned strings and an integer advisory id that points
+    into the auditor's shared advisory table instead of copying it.
+    """
+    __slots__ = ('package', 'version', 'type', 'file', 'path', 'advisory_id')
+
+    def __init__(self, package: str, version: str, dep_type: str, file: str,
+                 advisory_id: int, path: str = None):
+        self.package = sys.intern(package)
+        self.version = sys.intern(version)
+        self.type = sys.intern(dep_type)
+        self.file = sys.intern(file)
+        self.path = path
+        self.advisory_id = advisory_id
+
+NODE_MODULES = 'node_modules/'
+
+def extract_package_name(package_path: str) -> Tuple[str, int]:
+    """Return (package name, nesting depth) for a lockfile package path.
+
+    The name is whatever follows the last node_modules/ segment, so nested
+    paths such as node_modules/a/node_modules/@scope/b resolve to @scope/b.
+    Entries outside node_modules (workspaces) only get a best guess here;
+    their name field should be preferred when present.
+    """
+    index = package_path.rfind(NODE_MODULES)
+    if index == -1:
+        # Workspace or root entry, e.g. "packages/app"
+        return package_path.rsplit('/', 1)[-1], 0
+    
+    depth = package_path.count(NODE_MODULES)
+    name = package_path[index + len(NODE_MODULES):]
+    if not name.startswith('@'):
+        return name, depth
+    # Scoped packages keep both the scope and the package segment
+    parts = name.split('/', 2)
+    return '/'.join(parts[:2]), depth
+
+class LockfileColumns:
+    """Columnar view of the packages section of a package-lock.json.
+
+    Each attribute is a list with one entry per versioned package, so the
+    whole lockfile can be matched against the advisory set in one pass.
+    """
+    __slots__ = ('paths', 'names', 'versions', 'depths')
+
+    def __init__(self):
+        self.paths = []
+        self.names = []
+        self.versions = []
+        self.depths = []
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def add(self, package_path: str, name, version):
+        """Append one lockfile entry.
+
+        The root entry ("") is the project itself and is skipped, as are
+        entries without a string version. A string name field, set for
+        workspaces and aliased installs, takes precedence over the name
+        derived from the path.
+        """
+        if not package_path or not isinstance(version, str):
+            return
+        path_name, depth = extract_package_name(package_path)
+        self.paths.append(package_path)
+        self.names.append(name if isinstance(name, str) and name else path_name)
+        self.versions.append(version)
+        self.depths.append(depth)
+
+    @classmethod
+    def from_lock_data(cls, lock_data: Dict) -> 'LockfileColumns':
+        """Normalize decoded lockfile data into columns in a single pass."""
+        columns = cls()
+        if not isinstance(lock_data, dict) or not isinstance(lock_data.get('packages'), dict):
+            return columns
+        
+        add = columns.add
+        for package_path, package_info in lock_data['packages'].items():
+            if isinstance(package_info, dict):
+                add(package_path, package_info.get('name'), package_info.get('version'))
+        
+        return columns
+
+# Fields read by the lockfile checks
+LOCKFILE_FIELDS = ('version', 'name')
+
+class LockfileDecoder:
+    """Decode package-lock.json straight into LockfileColumns.
+
+    Only the msgspec backend decodes selectively: its structs skip every
+    field outside LOCKFILE_FIELDS without building Python objects for them.
+    The orjson and stdlib json fallbacks decode every field of every entry,
+    and LockfileColumns.from_lock_data then reads just the fields it needs,
+    so they save no decode time or allocations. Field values are typed
+    loosely and checked in LockfileColumns.add, so a malformed entry is
+    skipped rather than failing the whole file, and all backends give the
+    same columns.
+    """
+
+    def __init__(self, backend: str = None):
+        if backend is None:
+            backend = 'msgspec' if msgspec else 'orjson' if orjson else 'json'
+        self.backend = backend
+        
+        if backend == 'msgspec':
+            entry_type = msgspec.defstruct('LockEntry', [
+                (field, Any, None) for field in LOCKFILE_FIELDS
+            ])
+            lockfile_type = msgspec.defstruct('Lockfile', [
+                ('packages', Optional[Dict[str, entry_type]], None)
+            ])
+            self._decoder = msgspec.json.Decoder(lockfile_type)
+
+    def decode(self, data: bytes) -> LockfileColumns:
+        """Decode raw lockfile bytes into columns.
+
+        The bytes are decoded as strict UTF-8, after dropping a leading BOM,
+        before any backend sees them. Backends otherwise disagree: json
+        sniffs UTF-16 and accepts a BOM while orjson and msgspec do not,
+        and msgspec does not validate text inside skipped fields. Invalid
+        input raises ValueError on every backend.
+        """
+        if data.startswith(codecs.BOM_UTF8):
+            data = data[len(codecs.BOM_UTF8):]
+        text = data.decode('utf-8')
+        
+        if self.backend == 'msgspec':
+            try:
+                lockfile = self._decoder.decode(text)
+            except msgspec.ValidationError:
+                # Valid JSON with an unexpected shape, e.g. a non-object
+                # entry; the stdlib path skips such entries individually
+                return LockfileColumns.from_lock_data(json.loads(text))
+            columns = LockfileColumns()
+            if lockfile.packages is not None:
+                add = columns.add
+                for package_path, entry in lockfile.packages.items():
+                    add(package_path, entry.name, entry.version)
+            return columns
+        
+        if self.backend == 'orjson':
+            return LockfileColumns.from_lock_data(orjson.loads(text))
+        return LockfileColumns.from_lock_data(json.loads(text))
+
+# Scan times are stored as UTC strings in this format so they sort and
+# compare correctly as text
+SCAN_TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+def parse_scan_time(value: str, end_of_day: bool = False) -> str:
+    """Normalize an ISO 8601 date or datetime to SCAN_TIME_FORMAT.
+
+    A date-only value means the start of that day, or its last second when
+    end_of_day is set, so an upper bound of 2026-10-19 includes that day.
+    Naive times are taken as UTC. Raises ValueError for invalid input.
+    """
+    try:
+        moment = datetime.strptime(value, '%Y-%m-%d')
+        if end_of_day:
+            moment = moment.replace(hour=23, minute=59, second=59)
+    except ValueError:
+        # fromisoformat only accepts a trailing Z from Python 3.11
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        moment = datetime.fromisoformat(value)
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc)
+    return moment.strftime(SCAN_TIME_FORMAT)
+
+class ResultsStore:
+    """SQLite sink for scan results, used to query exposure across runs.
+
+    Every scan_project result becomes a row in scans and each of its
+    findings a row in findings. Findings are buffered and written with
+    executemany in batched transactions; the database runs in WAL mode.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scans (
+            scan_id INTEGER PRIMARY KEY,
+            project TEXT NOT NULL,
+            scan_time TEXT NOT NULL,
+            total_vulnerabilities INTEGER NOT NULL,
+            critical_vulnerabilities INTEGER NOT NULL,
+            high_vulnerabilities INTEGER NOT NULL,
+            attack_1_vulnerabilities INTEGER NOT NULL,
+            attack_2_vulnerabilities INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS findings (
+            scan_id INTEGER NOT NULL REFERENCES scans(scan_id),
+            package TEXT NOT NULL,
+            version TEXT NOT NULL,
+            type TEXT NOT NULL,
+            file TEXT NOT NULL,
+            path TEXT,
+            severity TEXT NOT NULL,
+            attack_date TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_findings_package_version ON findings(package, version);
+        CREATE INDEX IF NOT EXISTS idx_findings_scan ON findings(scan_id);
+        CREATE INDEX IF NOT EXISTS idx_scans_project ON scans(project, scan_time);
+        CREATE INDEX IF NOT EXISTS idx_scans_time ON scans(scan_time);
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 50000, readonly: bool = False):
+        """Open or create the database at db_path.
+
+        A readonly store opens an existing database for queries only, without
+        changing its journal mode or running the schema statements.
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.readonly = readonly
+        self._pending = []
+        if readonly:
+            uri = pathlib.Path(os.path.abspath(db_path)).as_uri() + '?mode=ro'
+            self.conn = sqlite3.connect(uri, uri=True)
+            return
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def add_result(self, result: Dict, scan_time: str, advisories: List[Dict]):
+        """Record one scan_project result and buffer its findings."""
+        cursor = self.conn.execute(
+            "INSERT INTO scans (project, scan_time, total_vulnerabilities, critical_vulnerabilities, "
+            "high_vulnerabilities, attack_1_vulnerabilities, attack_2_vulnerabilities) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                os.path.abspath(result['project_path']), scan_time,
+                result['total_vulnerabilities'], result['critical_vulnerabilities'],
+                result['high_vulnerabilities'], result['attack_1_vulnerabilities'],
+                result['attack_2_vulnerabilities']
+            )
+        )
+        scan_id = cursor.lastrowid
+        
+        pending = self._pending
+        for vulns in (result['package_json_vulns'], result['package_lock_vulns']):
+            for vuln in vulns:
+                advisory = advisories[vuln.advisory_id]
+                pending.append((
+                    scan_id, vuln.package, vuln.version, vuln.type, vuln.file, vuln.path,
+                    advisory['severity'], advisory['attack_date']
+                ))
+                if len(pending) >= self.batch_size:
+                    self.flush()
+
+    def flush(self):
+        """Write buffered findings and commit the current transaction."""
+        if self._pending:
+            self.conn.executemany(
+                "INSERT INTO findings (scan_id, package, version, type, file, path, severity, attack_date) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending
+            )
+            # Clear in place: add_result holds a reference to this list
+            self._pending.clear()
+        self.conn.commit()
+
+    def close(self):
+        """Flush pending findings and close the database."""
+        if not self.readonly:
+            self.flush()
+        self.conn.close()
+
+    def exposure_by_package(self, package: str, version: str = None,
+                            since: str = None, until: str = None) -> List[Tuple]:
+        """Return (project, scan_time, version, path) rows for scans that found a package.
+
+        since and until are ISO 8601 dates or datetimes; see parse_scan_time.
+        """
+        query = (
+            "SELECT s.project, s.scan_time, f.version, f.path FROM findings f "
+            "JOIN scans s ON s.scan_id = f.scan_id WHERE f.package = ?"
+        )
+        params = [package]
+        if version is not None:
+            query += " AND f.version = ?"
+            params.append(version)
+        if since is not None:
+            query += " AND s.scan_time >= ?"
+            params.append(parse_scan_time(since))
+        if until is not None:
+            query += " AND s.scan_time <= ?"
+            params.append(parse_scan_time(until, end_of_day=True))
+        query += " ORDER BY s.scan_time, s.project"
+        return self.conn.execute(query, params).fetchall()
+
+    def exposure_by_project(self, project: str) -> List[Tuple]:
+        """Return (scan_time, package, version, severity, path) rows from a project's latest scan."""
+        return self.conn.execute(
+            "SELECT s.scan_time, f.package, f.version, f.severity, f.path FROM findings f "
+            "JOIN scans s ON s.scan_id = f.scan_id "
+            "WHERE s.scan_id = (SELECT scan_id FROM scans WHERE project = ? "
+            "ORDER BY scan_time DESC, scan_id DESC LIMIT 1) "
+            "ORDER BY f.package, f.version",
+            (os.path.abspath(project),)
+        ).fetchall()
+
+    def new_since_last_scan(self) -> List[Tuple]:
+        """Return (project, package, version, path) findings absent from each project's previous scan."""
+        rows = []
+        projects = [row[0] for row in self.conn.execute("SELECT DISTINCT project FROM scans ORDER BY project")]
+        for project in projects:
+            scan_ids = [row[0] for row in self.conn.execute(
+                "SELECT scan_id FROM scans WHERE project = ? ORDER BY scan_time DESC, scan_id DESC LIMIT 2",
+                (project,)
+            )]
+            latest = scan_ids[0]
+            previous = scan_ids[1] if len(scan_ids) > 1 else None
+            for package, version, path in self.conn.execute(
+                "SELECT package, version, path FROM findings WHERE scan_id = ? "
+                "EXCEPT SELECT package, version, path FROM findings WHERE scan_id = ? "
+                "ORDER BY package, version",
+                (latest, previous)
+            ):
+                rows.append((project, package, version, path))
+        return rows
+
 class FinalNPMSecurityAuditor:
     def __init__(self):
         # Complete list of compromised packages from both attacks
@@ -432,6 +777,24 @@ class FinalNPMSecurityAuditor:
             }
         }
         
+        # Shared advisory table: findings reference advisories by index
+        self.advisory_names = list(self.compromised_packages)
+        self.advisory_ids = {name: i for i, name in enumerate(self.advisory_names)}
+        self.advisories = [self.compromised_packages[name] for name in self.advisory_names]
+        
+        # Advisory index for batched lockfile matching
+        self.wildcard_packages = {
+            name for name, info in self.compromised_packages.items()
+            if "*" in info["affected_versions"]
+        }
+        self.affected_pairs = {
+            (name, version)
+            for name, info in self.compromised_packages.items()
+            for version in info["affected_versions"]
+        }
+        
+        self.lockfile_decoder = LockfileDecoder()
+        
         self.vulnerabilities_found = []
         self.project_paths = []
 
@@ -447,6 +810,20 @@ class FinalNPMSecurityAuditor:
             print(f"Error parsing JSON file {file_path}: {e}")
             return {}
 
+    def load_lockfile(self, file_path: str) -> LockfileColumns:
+        """Load a package-lock.json, decoding only the fields the checks use."""
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            return self.lockfile_decoder.decode(data)
+        except FileNotFoundError:
+            print(f"Warning: File not found: {file_path}")
+            return LockfileColumns()
+        except ValueError as e:
+            # UTF-8, json, orjson and msgspec decode errors are all ValueErrors
+            print(f"Error parsing JSON file {file_path}: {e}")
+            return LockfileColumns()
+
     def check_version_vulnerability(self, package_name: str, version: str) -> bool:
         """Check if a specific package version is vulnerable."""
         if package_name not in self.compromised_packages:
@@ -461,8 +838,11 @@ class FinalNPMSecurityAuditor:
         # Check specific versions
         return version in affected_versions
 
-    def analyze_package_json(self, package_json_path: str) -> List[Dict]:
-        """Analyze package.json for direct dependencies."""
+    def analyze_package_json(self, package_json_path: str, results: Dict = None) -> List[Finding]:
+        """Analyze package.json for direct dependencies.
+
+        If results is given, its counters are updated as findings are produced.
+        """
         vulnerabilities = []
         package_data = self.load_json_file(package_json_path)
         
@@ -474,52 +854,60 @@ class FinalNPMSecurityAuditor:
             if dep_type in package_data:
                 for package_name, version_spec in package_data[dep_type].items():
                     if self.check_version_vulnerability(package_name, version_spec):
-                        vulnerabilities.append({
-                            'package': package_name,
-                            'version': version_spec,
-                            'type': dep_type,
-                            'file': package_json_path,
-                            'severity': self.compromised_packages[package_name]['severity'],
-                            'attack_info': self.compromised_packages[package_name]
-                        })
+                        # Wildcard advisories match any spec, including
+                        # malformed non-string ones; keep them reportable
+                        if not isinstance(version_spec, str):
+                            version_spec = str(version_spec)
+                        finding = Finding(
+                            package_name, version_spec, dep_type, package_json_path,
+                            self.advisory_ids[package_name]
+                        )
+                        vulnerabilities.append(finding)
+                        if results is not None:
+                            self.count_finding(results, finding)
         
         return vulnerabilities
 
-    def analyze_package_lock(self, package_lock_path: str) -> List[Dict]:
-        """Analyze package-lock.json for all dependencies including transitive ones."""
+    def analyze_package_lock(self, package_lock_path: str, results: Dict = None) -> List[Finding]:
+        """Analyze package-lock.json for all dependencies including transitive ones.
+
+        If results is given, its counters are updated as findings are produced.
+        """
         vulnerabilities = []
-        lock_data = self.load_json_file(package_lock_path)
+        columns = self.load_lockfile(package_lock_path)
         
-        if not lock_data or 'packages' not in lock_data:
-            return vulnerabilities
-            
-        # Check all packages in the lock file
-        for package_path, package_info in lock_data['packages'].items():
-            if 'version' in package_info:
-                # Extract package name from path
-                package_name = package_path.replace('node_modules/', '').split('/')[-1]
-                
-                # Handle scoped packages
-                if package_path.startswith('node_modules/@'):
-                    parts = package_path.replace('node_modules/', '').split('/')
-                    if len(parts) >= 2:
-                        package_name = f"{parts[0]}/{parts[1]}"
-                
-                version = package_info['version']
-                
-                if self.check_version_vulnerability(package_name, version):
-                    vulnerabilities.append({
-                        'package': package_name,
-                        'version': version,
-                        'type': 'transitive' if 'node_modules' in package_path else 'direct',
-                        'file': package_lock_path,
-                        'path': package_path,
-                        'severity': self.compromised_packages[package_name]['severity'],
-                        'attack_info': self.compromised_packages[package_name]
-                    })
+        for row in self.match_lockfile(columns):
+            package_name = columns.names[row]
+            finding = Finding(
+                package_name, columns.versions[row],
+                'transitive' if columns.depths[row] else 'direct',
+                package_lock_path, self.advisory_ids[package_name],
+                path=columns.paths[row]
+            )
+            vulnerabilities.append(finding)
+            if results is not None:
+                self.count_finding(results, finding)
         
         return vulnerabilities
 
+    def match_lockfile(self, columns: LockfileColumns) -> List[int]:
+        """Return the row indices of lockfile columns that match an advisory.
+
+        The name column is joined against the advisory set in one pass and
+        only the surviving rows have their versions checked.
+        """
+        wildcard = self.wildcard_packages
+        affected = self.affected_pairs
+        advisory_ids = self.advisory_ids
+        names = columns.names
+        versions = columns.versions
+        
+        candidates = [row for row, name in enumerate(names) if name in advisory_ids]
+        return [
+            row for row in candidates
+            if names[row] in wildcard or (names[row], versions[row]) in affected
+        ]
+
     def scan_project(self, project_path: str) -> Dict:
         """Scan a project for vulnerabilities."""
         results = {
@@ -536,29 +924,29 @@ class FinalNPMSecurityAuditor:
         # Check for package.json
         package_json_path = os.path.join(project_path, 'package.json')
         if os.path.exists(package_json_path):
-            results['package_json_vulns'] = self.analyze_package_json(package_json_path)
+            results['package_json_vulns'] = self.analyze_package_json(package_json_path, results)
         
         # Check for package-lock.json
         package_lock_path = os.path.join(project_path, 'package-lock.json')
         if os.path.exists(package_lock_path):
-            results['package_lock_vulns'] = self.analyze_package_lock(package_lock_path)
+            results['package_lock_vulns'] = self.analyze_package_lock(package_lock_path, results)
         
-        all_vulns = results['package_json_vulns'] + results['package_lock_vulns']
-        results['total_vulnerabilities'] = len(all_vulns)
+        return results
+
+    def count_finding(self, results: Dict, finding: Finding):
+        """Update a project's severity and attack counters for one finding."""
+        advisory = self.advisories[finding.advisory_id]
+        results['total_vulnerabilities'] += 1
         
-        # Count by severity and attack
-        for vuln in all_vulns:
-            if vuln['severity'] == 'CRITICAL':
-                results['critical_vulnerabilities'] += 1
-            elif vuln['severity'] == 'HIGH':
-                results['high_vulnerabilities'] += 1
-            
-            if vuln['attack_info']['attack_date'] == '2025-09-08':
-                results['attack_1_vulnerabilities'] += 1
-            elif vuln['attack_info']['attack_date'] == '2025-09-16':
-                results['attack_2_vulnerabilities'] += 1
+        if advisory['severity'] == 'CRITICAL':
+            results['critical_vulnerabilities'] += 1
+        elif advisory['severity'] == 'HIGH':
+            results['high_vulnerabilities'] += 1
         
-        return results
+        if advisory['attack_date'] == ATTACK_1_DATE:
+            results['attack_1_vulnerabilities'] += 1
+        elif advisory['attack_date'] == ATTACK_2_DATE:
+            results['attack_2_vulnerabilities'] += 1
 
     def generate_report(self, results: List[Dict]) -> str:
         """Generate a comprehensive security report."""
@@ -605,18 +993,19 @@ class FinalNPMSecurityAuditor:
                 report.append(f"Attack 1: {result['attack_1_vulnerabilities']}, Attack 2: {result['attack_2_vulnerabilities']}")
                 report.append("")
                 
-                all_vulns = result['package_json_vulns'] + result['package_lock_vulns']
-                for vuln in all_vulns:
-                    report.append(f"Package: {vuln['package']}")
-                    report.append(f"Version: {vuln['version']}")
-                    report.append(f"Type: {vuln['type']}")
-                    report.append(f"Severity: {vuln['severity']}")
-                    report.append(f"Attack Date: {vuln['attack_info']['attack_date']}")
-                    report.append(f"Weekly Downloads: {vuln['attack_info'].get('weekly_downloads', 'Unknown')}")
-                    report.append(f"Description: {vuln['attack_info']['description']}")
-                    if 'path' in vuln:
-                        report.append(f"Path: {vuln['path']}")
-                    report.append("")
+                for vulns in (result['package_json_vulns'], result['package_lock_vulns']):
+                    for vuln in vulns:
+                        attack_info = self.advisories[vuln.advisory_id]
+                        report.append(f"Package: {vuln.package}")
+                        report.append(f"Version: {vuln.version}")
+                        report.append(f"Type: {vuln.type}")
+                        report.append(f"Severity: {attack_info['severity']}")
+                        report.append(f"Attack Date: {attack_info['attack_date']}")
+                        report.append(f"Weekly Downloads: {attack_info.get('weekly_downloads', 'Unknown')}")
+                        report.append(f"Description: {attack_info['description']}")
+                        if vuln.path is not None:
+                            report.append(f"Path: {vuln.path}")
+                        report.append("")
         
         # Add malware indicators
         report.append("=" * 120)
@@ -673,27 +1062,101 @@ class FinalNPMSecurityAuditor:
         
         return "\n".join(report)
 
-    def run_audit(self, project_paths: List[str]) -> str:
-        """Run the complete security audit."""
+    def run_audit(self, project_paths: List[str], store: ResultsStore = None) -> str:
+        """Run the complete security audit, recording results in store if given."""
         print("Starting Final Comprehensive NPM Supply Chain Attack Security Audit...")
         print(f"Scanning {len(project_paths)} project(s)...")
         print(f"Checking against {len(self.compromised_packages)} known compromised packages...")
         print("Including both Attack 1 (crypto wallet hijacking) and Attack 2 (advanced malware) attacks")
         
+        scan_time = datetime.now(timezone.utc).strftime(SCAN_TIME_FORMAT)
         results = []
         for project_path in project_paths:
             print(f"Scanning: {project_path}")
             result = self.scan_project(project_path)
             results.append(result)
+            if store is not None:
+                store.add_result(result, scan_time, self.advisories)
             print(f"  - Total vulnerabilities: {result['total_vulnerabilities']}")
             print(f"  - Critical: {result['critical_vulnerabilities']}, High: {result['high_vulnerabilities']}")
             print(f"  - Attack 1: {result['attack_1_vulnerabilities']}, Attack 2: {result['attack_2_vulnerabilities']}")
         
+        if store is not None:
+            store.flush()
+        
         report = self.generate_report(results)
         return report
 
+def run_query(argv: List[str]):
+    """Query a results database written with --db."""
+    parser = argparse.ArgumentParser(
+        prog="security-audit-final.py query",
+        description="Query scan results stored in a SQLite database."
+    )
+    parser.add_argument('--db', required=True, help="Results database written by a previous audit")
+    subparsers = parser.add_subparsers(dest='query', required=True)
+    
+    package_parser = subparsers.add_parser('package', help="Projects exposed to a package")
+    package_parser.add_argument('package', help="Package name, optionally name@version")
+    package_parser.add_argument('--since', help="Only scans at or after this date or time (ISO 8601, UTC)")
+    package_parser.add_argument('--until', help="Only scans at or before this date or time; a date includes the whole day")
+    
+    project_parser = subparsers.add_parser('project', help="Findings from a project's latest scan")
+    project_parser.add_argument('project', help="Project directory; relative paths are resolved from here")
+    
+    subparsers.add_parser('new', help="Findings new since each project's previous scan")
+    
+    args = parser.parse_args(argv)
+    
+    if args.query == 'package':
+        for bound in (args.since, args.until):
+            if bound is not None:
+                try:
+                    parse_scan_time(bound)
+                except ValueError:
+                    parser.error(f"invalid date or time: {bound}")
+    
+    if not os.path.exists(args.db):
+        print(f"Error: Results database not found: {args.db}")
+        sys.exit(1)
+    
+    store = ResultsStore(args.db, readonly=True)
+    try:
+        if args.query == 'package':
+            # Split on the last @ so scoped names like @ctrl/tinycolor@4.1.1 work
+            package, version = args.package, None
+            if '@' in args.package[1:]:
+                package, version = args.package.rsplit('@', 1)
+            for project, scan_time, found_version, path in store.exposure_by_package(
+                    package, version, args.since, args.until):
+                print(f"{scan_time}  {project}  {package}@{found_version}  {path or ''}")
+        elif args.query == 'project':
+            for scan_time, package, version, severity, path in store.exposure_by_project(args.project):
+                print(f"{scan_time}  {package}@{version}  {severity}  {path or ''}")
+        else:
+            for project, package, version, path in store.new_since_last_scan():
+                print(f"{project}  {package}@{version}  {path or ''}")
+    finally:
+        store.close()
+
 def main():
     """Main function to run the final comprehensive security audit."""
+    # A first argument of "query" selects the query command, so a project
+    # directory literally named query must be passed as ./query or -- query
+    if len(sys.argv) > 1 and sys.argv[1] == 'query':
+        run_query(sys.argv[2:])
+        return
+    
+    parser = argparse.ArgumentParser(
+        description="Scan projects for packages compromised in the September 2025 NPM attacks.",
+        epilog="Run 'security-audit-final.py query --help' to query a results database. "
+               "A first argument of 'query' always selects that command; to scan a "
+               "project directory named query, pass it as ./query or after --."
+    )
+    parser.add_argument('project_paths', nargs='*', help="Project directories to scan")
+    parser.add_argument('--db', help="Also record results in this SQLite database")
+    args = parser.parse_args()
+    
     auditor = FinalNPMSecurityAuditor()
     
     # Default project paths (modify as needed)
@@ -703,8 +1166,8 @@ def main():
     ]
     
     # Allow command line arguments for custom paths
-    if len(sys.argv) > 1:
-        project_paths = sys.argv[1:]
+    if args.project_paths:
+        project_paths = args.project_paths
     else:
         project_paths = default_paths
     
@@ -713,11 +1176,18 @@ def main():
     
     if not existing_paths:
         print("Error: No valid project paths found.")
-        print("Usage: python security-audit-final.py [project_path1] [project_path2] ...")
+        print("Usage: python security-audit-final.py [--db results.db] [project_path1] [project_path2] ...")
+        print("       python security-audit-final.py query --db results.db {package,project,new} ...")
+        print("A first argument of 'query' selects the query command; scan a directory named query as ./query")
         sys.exit(1)
     
     # Run the audit
-    report = auditor.run_audit(existing_paths)
+    store = ResultsStore(args.db) if args.db else None
+    try:
+        report = auditor.run_audit(existing_paths, store)
+    finally:
+        if store is not None:
+            store.close()
     
     # Print report to console
     print("\n" + report)
@@ -728,6 +1198,8 @@ def main():
         f.write(report)
     
     print(f"\nFinal comprehensive report saved to: {report_file}")
+    if store is not None:
+        print(f"Scan results recorded in: {args.db}")
 
 if __name__ == "__main__":
     main()
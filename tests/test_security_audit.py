@@ -0,0 +1,246 @@
+"""Tests for security-audit-final.py."""
+
+import codecs
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+
+SCRIPT_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'security-audit-final.py')
+
+# The script's file name is not a valid module name, so load it by path
+spec = importlib.util.spec_from_file_location('security_audit_final', SCRIPT_PATH)
+audit = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(audit)
+
+
+def write_json(directory: str, name: str, data) -> str:
+    path = os.path.join(directory, name)
+    if isinstance(data, bytes):
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(data if isinstance(data, str) else json.dumps(data))
+    return path
+
+
+class PackageJsonTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.auditor = audit.FinalNPMSecurityAuditor()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_counters_follow_findings(self):
+        write_json(self.tmp.name, 'package.json', {
+            'dependencies': {'backslash': '0.2.1', 'chalk': '^5.0.0'},
+            'devDependencies': {'tinycolor': '^1.0.0'},
+        })
+        result = self.auditor.scan_project(self.tmp.name)
+        self.assertEqual(
+            [(f.package, f.version, f.type) for f in result['package_json_vulns']],
+            [('backslash', '0.2.1', 'dependencies'), ('tinycolor', '^1.0.0', 'devDependencies')]
+        )
+        self.assertEqual(result['total_vulnerabilities'], 2)
+        self.assertEqual(result['critical_vulnerabilities'], 1)
+        self.assertEqual(result['high_vulnerabilities'], 1)
+        self.assertEqual(result['attack_1_vulnerabilities'], 1)
+        self.assertEqual(result['attack_2_vulnerabilities'], 1)
+
+    def test_non_string_spec_on_wildcard_advisory(self):
+        for spec in ({'version': '1'}, None, 1):
+            with self.subTest(spec=spec):
+                path = write_json(self.tmp.name, 'package.json', {'dependencies': {'tinycolor': spec}})
+                found = self.auditor.analyze_package_json(path)
+                self.assertEqual([(f.package, f.version) for f in found], [('tinycolor', str(spec))])
+
+
+class LockfileNameTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.auditor = audit.FinalNPMSecurityAuditor()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def scan_lock(self, packages):
+        path = write_json(self.tmp.name, 'package-lock.json', {'lockfileVersion': 3, 'packages': packages})
+        return [(f.package, f.path) for f in self.auditor.analyze_package_lock(path)]
+
+    def test_nested_scoped_path(self):
+        found = self.scan_lock({
+            'node_modules/a/node_modules/@ctrl/tinycolor': {'version': '4.1.1'},
+        })
+        self.assertEqual(found, [('@ctrl/tinycolor', 'node_modules/a/node_modules/@ctrl/tinycolor')])
+
+    def test_workspace_uses_name_field(self):
+        found = self.scan_lock({
+            '': {'name': 'debug', 'version': '4.4.2'},
+            'packages/debug': {'name': 'my-debug-tools', 'version': '4.4.2'},
+        })
+        self.assertEqual(found, [])
+
+    def test_aliased_install_uses_name_field(self):
+        found = self.scan_lock({
+            'node_modules/my-chalk': {'name': 'chalk', 'version': '5.6.1'},
+        })
+        self.assertEqual(found, [('chalk', 'node_modules/my-chalk')])
+
+
+class LockfileDecoderTests(unittest.TestCase):
+    BACKENDS = ['json'] + [
+        name for name, module in (('orjson', audit.orjson), ('msgspec', audit.msgspec)) if module
+    ]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def findings_by_backend(self, lock_data):
+        path = write_json(self.tmp.name, 'package-lock.json', lock_data)
+        found = {}
+        for backend in self.BACKENDS:
+            auditor = audit.FinalNPMSecurityAuditor()
+            auditor.lockfile_decoder = audit.LockfileDecoder(backend)
+            found[backend] = [
+                (f.package, f.version, f.type, f.path)
+                for f in auditor.analyze_package_lock(path)
+            ]
+        return found
+
+    def assert_same_findings(self, lock_data, expected):
+        for backend, found in self.findings_by_backend(lock_data).items():
+            with self.subTest(backend=backend):
+                self.assertEqual(found, expected)
+
+    def test_unused_fields_are_ignored(self):
+        self.assert_same_findings({'packages': {
+            'node_modules/chalk': {
+                'version': '5.6.1', 'resolved': 'https://registry.npmjs.org/chalk/-/chalk-5.6.1.tgz',
+                'integrity': 'sha512-x', 'engines': {'node': '>=12'}, 'funding': {'url': 'https://x'},
+            },
+        }}, [('chalk', '5.6.1', 'transitive', 'node_modules/chalk')])
+
+    def test_malformed_entries_do_not_hide_findings(self):
+        self.assert_same_findings({'packages': {
+            'node_modules/a': {'version': '1.0.0', 'dev': None, 'optional': 1},
+            'node_modules/b': {'version': 3},
+            'node_modules/c': ['not', 'an', 'object'],
+            'node_modules/d': {'version': '1.0.0', 'name': 7},
+            'node_modules/chalk': {'version': '5.6.1'},
+        }}, [('chalk', '5.6.1', 'transitive', 'node_modules/chalk')])
+
+    def test_utf8_bom_is_accepted(self):
+        data = json.dumps({'packages': {'node_modules/chalk': {'version': '5.6.1'}}}).encode('utf-8')
+        self.assert_same_findings(codecs.BOM_UTF8 + data, [('chalk', '5.6.1', 'transitive', 'node_modules/chalk')])
+
+    def test_invalid_encodings_are_rejected(self):
+        chalk = {'packages': {'node_modules/chalk': {'version': '5.6.1', 'license': 'MIT'}}}
+        invalid = {
+            'bad utf-8 in skipped field': json.dumps(chalk).encode('utf-8').replace(b'MIT', b'M\xffIT'),
+            'utf-16': json.dumps(chalk).encode('utf-16'),
+        }
+        for label, data in invalid.items():
+            with self.subTest(label=label):
+                self.assert_same_findings(data, [])
+
+    def test_missing_or_invalid_packages(self):
+        for lock_data in ({'lockfileVersion': 1}, {'packages': []}, []):
+            with self.subTest(lock_data=lock_data):
+                self.assert_same_findings(lock_data, [])
+
+
+class ResultsStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.auditor = audit.FinalNPMSecurityAuditor()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_result(self, project: str, count: int):
+        advisory_id = self.auditor.advisory_ids['chalk']
+        findings = [
+            audit.Finding('chalk', '5.6.1', 'transitive', 'package-lock.json', advisory_id,
+                          path=f'node_modules/x{i}/node_modules/chalk')
+            for i in range(count)
+        ]
+        return {
+            'project_path': project,
+            'package_json_vulns': [],
+            'package_lock_vulns': findings,
+            'total_vulnerabilities': count,
+            'critical_vulnerabilities': count,
+            'high_vulnerabilities': 0,
+            'attack_1_vulnerabilities': count,
+            'attack_2_vulnerabilities': 0
+        }
+
+    def test_batched_inserts_keep_every_finding(self):
+        store = audit.ResultsStore(os.path.join(self.tmp.name, 'results.db'), batch_size=10)
+        counts = {'p0': 7, 'p1': 7, 'p2': 25, 'p3': 3, 'p4': 10}
+        for project, count in counts.items():
+            store.add_result(self.make_result(project, count), '2026-10-13T10:00:00Z', self.auditor.advisories)
+        store.flush()
+        
+        stored = dict(store.conn.execute(
+            "SELECT s.project, COUNT(*) FROM findings f JOIN scans s ON s.scan_id = f.scan_id "
+            "GROUP BY s.project"
+        ).fetchall())
+        store.close()
+        self.assertEqual(stored, {os.path.abspath(project): count for project, count in counts.items()})
+
+    def test_date_only_bounds_cover_the_whole_day(self):
+        store = audit.ResultsStore(os.path.join(self.tmp.name, 'results.db'))
+        store.add_result(self.make_result('svc', 1), '2026-10-19T14:59:20Z', self.auditor.advisories)
+        store.flush()
+        
+        self.assertEqual(len(store.exposure_by_package('chalk', '5.6.1', since='2026-10-19', until='2026-10-19')), 1)
+        self.assertEqual(len(store.exposure_by_package('chalk', until='2026-10-18')), 0)
+        self.assertEqual(len(store.exposure_by_package('chalk', since='2026-10-19T16:59:21+02:00')), 0)
+        self.assertEqual(len(store.exposure_by_package('chalk', since='2026-10-19T14:59:20Z')), 1)
+        store.close()
+
+    def test_projects_are_stored_as_absolute_paths(self):
+        store = audit.ResultsStore(os.path.join(self.tmp.name, 'results.db'))
+        project = os.path.join(self.tmp.name, 'svc')
+        relative = os.path.relpath(project)
+        store.add_result(self.make_result(project, 1), '2026-10-13T10:00:00Z', self.auditor.advisories)
+        store.add_result(self.make_result(relative, 2), '2026-10-14T10:00:00Z', self.auditor.advisories)
+        store.flush()
+        
+        self.assertEqual(len(store.exposure_by_project(relative)), 2)
+        self.assertEqual(
+            {row[0] for row in store.new_since_last_scan()},
+            {os.path.abspath(project)}
+        )
+        store.close()
+
+
+    def test_readonly_store_does_not_modify_database(self):
+        db_path = os.path.join(self.tmp.name, 'results.db')
+        store = audit.ResultsStore(db_path)
+        store.add_result(self.make_result('svc', 1), '2026-10-13T10:00:00Z', self.auditor.advisories)
+        store.flush()
+        store.conn.execute("PRAGMA journal_mode=DELETE")
+        store.conn.execute("DROP INDEX idx_scans_time")
+        store.close()
+        
+        reader = audit.ResultsStore(db_path, readonly=True)
+        self.assertEqual(len(reader.exposure_by_package('chalk')), 1)
+        self.assertEqual(reader.conn.execute("PRAGMA journal_mode").fetchone()[0], 'delete')
+        self.assertIsNone(reader.conn.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'idx_scans_time'"
+        ).fetchone())
+        with self.assertRaises(audit.sqlite3.OperationalError):
+            reader.conn.execute("CREATE TABLE extra (x)")
+        reader.close()
+
+
+if __name__ == '__main__':
+    unittest.main()